@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/17 10:00
+Desc: clist 分页及分批结果解码与拼装的耗时与峰值内存对比, 输入为响应原始字节
+legacy: 每页 json.loads 后建一个 DataFrame, 按批次 concat 后再 concat(axis=1) 并去除重复列
+assembler: json.loads 后写入 ClistAssembler 的 object 列, 按 (f13, f12) 对齐
+decode: decode_clist_page 解析后逐字段一次遍历写入 ClistAssembler 的定型列
+运行: python benchmarks/bench_clist_assemble.py
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from my_ak import ClistAssembler, decode_clist_page  # noqa: E402
+
+
+def make_pages(rows: int, fields: int, batch_size: int, per_page_num: int):
+    """
+    构造与 clist 接口结构一致的模拟 diff 页面
+    :return: 字段批次及 (批次, 页码, 响应字节) 列表
+    :rtype: tuple
+    """
+    field_list = [f"f{i}" for i in range(1, fields + 1)]
+    field_batches = [
+        field_list[i : i + batch_size] for i in range(0, len(field_list), batch_size)
+    ]
+    field_batches = [
+        fields + [key for key in ("f12", "f13") if key not in fields]
+        for fields in field_batches
+    ]
+    rnd = random.Random(0)
+    total_page = -(-rows // per_page_num)
+    pages = []
+    for batch, batch_fields in enumerate(field_batches):
+        for page in range(1, total_page + 1):
+            diff = []
+            for row in range((page - 1) * per_page_num, min(page * per_page_num, rows)):
+                item = {
+                    field: (rnd.random() if rnd.random() < 0.4 else "-")
+                    for field in batch_fields
+                }
+                item["f12"] = f"{row:06d}"
+                item["f13"] = row % 2
+                diff.append(item)
+            body = json.dumps({"data": {"total": rows, "diff": diff}}).encode()
+            pages.append((batch, page, body))
+    # 模拟 as_completed 的乱序返回
+    rnd.shuffle(pages)
+    return field_batches, total_page, pages
+
+
+def legacy_assemble(field_batches, total_page, per_page_num, pages):
+    batch_list = [[] for _ in field_batches]
+    for batch, page, body in pages:
+        batch_list[batch].append(pd.DataFrame(json.loads(body)["data"]["diff"]))
+    temp_df = pd.concat(
+        [pd.concat(temp_list, ignore_index=True) for temp_list in batch_list], axis=1
+    )
+    return temp_df.loc[:, ~temp_df.columns.duplicated()]
+
+
+def assembler_assemble(field_batches, total_page, per_page_num, pages):
+    assembler = ClistAssembler(
+        [field for fields in field_batches for field in fields], per_page_num, total_page
+    )
+    for batch, page, body in pages:
+        assembler.add_page(page, json.loads(body)["data"]["diff"])
+    return assembler.to_frame()
+
+
+def decode_assemble(field_batches, total_page, per_page_num, pages):
+    fields = [field for fields in field_batches for field in fields]
+    dtypes = {field: "float64" for field in fields}
+    dtypes.update({"f12": "str", "f13": "int64"})
+    assembler = ClistAssembler(fields, per_page_num, total_page, dtypes)
+    for batch, page, body in pages:
+        _, diff = decode_clist_page(body)
+        assembler.add_page(page, diff)
+    return assembler.to_frame()
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5500)
+    parser.add_argument("--fields", type=int, default=600)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--per-page", type=int, default=100)
+    args = parser.parse_args()
+
+    field_batches, total_page, pages = make_pages(
+        args.rows, args.fields, args.batch_size, args.per_page
+    )
+    print(f"rows={args.rows} fields={args.fields} pages={len(pages)}")
+    print(f"{'path':<12}{'wall(s)':>10}{'peak(MB)':>12}{'frame(MB)':>12}  shape")
+    for name, func in [
+        ("legacy", legacy_assemble),
+        ("assembler", assembler_assemble),
+        ("decode", decode_assemble),
+    ]:
+        temp_df, elapsed, peak = measure(
+            func, field_batches, total_page, args.per_page, pages
+        )
+        size = temp_df.memory_usage(deep=True).sum()
+        print(
+            f"{name:<12}{elapsed:>10.3f}{peak / 2**20:>12.1f}{size / 2**20:>12.1f}"
+            f"  {temp_df.shape}"
+        )
+
+
+if __name__ == "__main__":
+    main()
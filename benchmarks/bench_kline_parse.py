@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/17 12:00
+Desc: K 线解析的耗时对比
+旧路径: 逐行 split 后对十个 object 列分别 pd.to_numeric
+新路径: _parse_klines 一次性解析为定型列
+运行: python benchmarks/bench_kline_parse.py [--payload-dir DIR]
+DIR 下的 *.json 为录制的 K 线接口响应, 不指定时使用模拟数据
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from my_ak import _parse_klines  # noqa: E402
+
+
+def legacy_parse_klines(data_json, symbol):
+    if not (data_json["data"] and data_json["data"]["klines"]):
+        return pd.DataFrame()
+    temp_df = pd.DataFrame([item.split(",") for item in data_json["data"]["klines"]])
+    temp_df["股票代码"] = symbol
+    temp_df.columns = [
+        "日期",
+        "开盘",
+        "收盘",
+        "最高",
+        "最低",
+        "成交量",
+        "成交额",
+        "振幅",
+        "涨跌幅",
+        "涨跌额",
+        "换手率",
+        "股票代码",
+    ]
+    temp_df["日期"] = pd.to_datetime(temp_df["日期"], errors="coerce").dt.date
+    temp_df["开盘"] = pd.to_numeric(temp_df["开盘"], errors="coerce")
+    temp_df["收盘"] = pd.to_numeric(temp_df["收盘"], errors="coerce")
+    temp_df["最高"] = pd.to_numeric(temp_df["最高"], errors="coerce")
+    temp_df["最低"] = pd.to_numeric(temp_df["最低"], errors="coerce")
+    temp_df["成交量"] = pd.to_numeric(temp_df["成交量"], errors="coerce")
+    temp_df["成交额"] = pd.to_numeric(temp_df["成交额"], errors="coerce")
+    temp_df["振幅"] = pd.to_numeric(temp_df["振幅"], errors="coerce")
+    temp_df["涨跌幅"] = pd.to_numeric(temp_df["涨跌幅"], errors="coerce")
+    temp_df["涨跌额"] = pd.to_numeric(temp_df["涨跌额"], errors="coerce")
+    temp_df["换手率"] = pd.to_numeric(temp_df["换手率"], errors="coerce")
+    temp_df = temp_df[
+        [
+            "日期",
+            "股票代码",
+            "开盘",
+            "收盘",
+            "最高",
+            "最低",
+            "成交量",
+            "成交额",
+            "振幅",
+            "涨跌幅",
+            "涨跌额",
+            "换手率",
+        ]
+    ]
+    return temp_df
+
+
+def make_payloads(symbols: int, bars: int):
+    """
+    构造与 K 线接口结构一致的模拟响应
+    :return: 模拟响应列表
+    :rtype: list
+    """
+    rnd = random.Random(0)
+    dates = pd.bdate_range("1991-01-01", periods=bars).strftime("%Y-%m-%d")
+    payloads = []
+    for _ in range(symbols):
+        price = 10.0
+        klines = []
+        for date in dates:
+            close = round(price * (1 + rnd.uniform(-0.1, 0.1)), 2)
+            klines.append(
+                f"{date},{price:.2f},{close:.2f},{max(price, close):.2f},"
+                f"{min(price, close):.2f},{rnd.randint(1000, 10**7)},"
+                f"{rnd.uniform(1e6, 1e9):.1f},{rnd.uniform(0, 20):.2f},"
+                f"{(close / price - 1) * 100:.2f},{close - price:.2f},"
+                f"{rnd.uniform(0, 10):.2f}"
+            )
+            price = close
+        payloads.append({"data": {"klines": klines}})
+    return payloads
+
+
+def load_payloads(payload_dir: str):
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(payload_dir, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            data_json = json.load(f)
+        if isinstance(data_json.get("data"), dict) and data_json["data"].get("klines"):
+            payloads.append(data_json)
+    return payloads
+
+
+def measure(func, payloads, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data_json in payloads:
+            func(data_json, "000001")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--payload-dir", default=None)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--bars", type=int, default=6000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.payload_dir:
+        payloads = load_payloads(args.payload_dir)
+    else:
+        payloads = make_payloads(args.symbols, args.bars)
+    bars = sum(len(data_json["data"]["klines"]) for data_json in payloads)
+    print(f"payloads={len(payloads)} bars={bars}")
+    print(f"{'path':<20}{'best(s)':>10}{'bars/s':>14}")
+    for name, func in [
+        ("legacy", legacy_parse_klines),
+        ("vectorized-f64", lambda d, s: _parse_klines(d, s, "float64")),
+        ("vectorized-f32", lambda d, s: _parse_klines(d, s, "float32")),
+    ]:
+        elapsed = measure(func, payloads, args.repeat)
+        print(f"{name:<20}{elapsed:>10.3f}{bars / elapsed:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
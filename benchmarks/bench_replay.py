@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/17 16:00
+Desc: 抓取路径的离线回放基准测试
+录制: python benchmarks/bench_replay.py record --dir recordings
+回放: python benchmarks/bench_replay.py run --dir recordings [--latency 0.05 --error-rate 0.01]
+回放时可用 --save-baseline 保存结果, 之后用 --baseline 对比, 吞吐下降超过 --tolerance 时退出码为 1
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from em_fields import CANDIDATE_FIELDS, pack_fields  # noqa: E402
+from em_metrics import StatsCollector  # noqa: E402
+from em_replay import ReplayServer, ResponseRecorder  # noqa: E402
+from my_ak import (  # noqa: E402
+    KLINE_URL,
+    SPOT_BASE_PARAMS,
+    SPOT_URL,
+    fetch_paginated_data,
+    stock_zh_a_hist,
+    stock_zh_a_hist_many,
+    stock_zh_a_spot_em,
+)
+
+DEFAULT_SYMBOLS = "000001,000002,600000,600519,300750,688981,430047,830799"
+
+
+def record(args):
+    recorder = ResponseRecorder(args.dir)
+    symbols = args.symbols.split(",")
+    stock_zh_a_spot_em(field_cache=None, recorder=recorder)
+    stock_zh_a_hist(symbol=symbols[0], recorder=recorder)
+    stock_zh_a_hist_many(symbols, recorder=recorder)
+    print(f"已录制到 {args.dir}")
+
+
+def run_case(func):
+    stats = StatsCollector()
+    start = time.perf_counter()
+    error = None
+    try:
+        func(stats)
+    except Exception as e:
+        # 注入错误时重试耗尽属于正常结果, 记录下来继续其余用例
+        error = repr(e)
+    elapsed = time.perf_counter() - start
+    return {"elapsed": elapsed, "error": error, **stats.summary()}
+
+
+def run(args):
+    server = ReplayServer(
+        args.dir,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate=args.rate,
+    )
+    base_url = server.start_in_thread()
+    spot_url = base_url + urlsplit(SPOT_URL).path
+    kline_url = base_url + urlsplit(KLINE_URL).path
+    symbols = args.symbols.split(",")
+    cases = {
+        "stock_zh_a_spot_em": lambda stats: stock_zh_a_spot_em(
+            field_cache=None, url=spot_url, hooks=[stats]
+        ),
+        "fetch_paginated_data": lambda stats: fetch_paginated_data(
+            spot_url,
+            {**SPOT_BASE_PARAMS, "fields": pack_fields(CANDIDATE_FIELDS)[0]},
+            hooks=[stats],
+        ),
+        "stock_zh_a_hist": lambda stats: stock_zh_a_hist(
+            symbol=symbols[0], url=kline_url, hooks=[stats]
+        ),
+        "stock_zh_a_hist_many": lambda stats: stock_zh_a_hist_many(
+            symbols, url=kline_url, hooks=[stats], rate=None
+        ),
+    }
+    results = {}
+    try:
+        for name, func in cases.items():
+            results[name] = run_case(func)
+    finally:
+        server.stop_thread()
+    results["server"] = {
+        "requests": server.requests,
+        "missing": server.missing,
+        "throttled": server.throttled,
+        "errors": server.errors,
+    }
+    print(json.dumps(results, indent=1, ensure_ascii=False))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressed = False
+        for name in cases:
+            if name not in baseline:
+                continue
+            if results[name]["error"] or baseline[name].get("error"):
+                print(f"{name:<24}{'失败':>8} 不参与对比")
+                continue
+            ratio = baseline[name]["elapsed"] / results[name]["elapsed"]
+            print(f"{name:<24}{ratio:>8.2f}x 相对基线")
+            if ratio < 1 - args.tolerance:
+                regressed = True
+        if regressed:
+            sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record")
+    record_parser.add_argument("--dir", default="recordings")
+    record_parser.add_argument("--symbols", default=DEFAULT_SYMBOLS)
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("--dir", default="recordings")
+    run_parser.add_argument("--symbols", default=DEFAULT_SYMBOLS)
+    run_parser.add_argument("--latency", type=float, default=0.05)
+    run_parser.add_argument("--jitter", type=float, default=0.02)
+    run_parser.add_argument("--error-rate", type=float, default=0.0)
+    run_parser.add_argument("--rate", type=float, default=None)
+    run_parser.add_argument("--baseline", default=None)
+    run_parser.add_argument("--save-baseline", default=None)
+    run_parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
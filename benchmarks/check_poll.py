@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/17 17:00
+Desc: 盘中轮询的离线检查, 以 SpotStubServer 提供逐轮变化的行情
+检查变化检测只输出本轮变化的证券, 以及消费者跟不上时 coalesce 与 drop_oldest 的处理
+运行: python benchmarks/check_poll.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from em_poll import SpotPoller  # noqa: E402
+from em_replay import SpotStubServer  # noqa: E402
+
+FIELDS = ["f2", "f3", "f5"]
+ROWS = 500
+CHANGE_RATE = 0.1
+
+
+def delta_keys(delta_df):
+    return set(zip(delta_df["f13"], delta_df["f12"]))
+
+
+async def check_changes():
+    server = SpotStubServer(rows=ROWS, change_rate=CHANGE_RATE)
+    async with server as base_url:
+        # 间隔足够长, 后台只完成首轮抓取, 之后手动逐轮抓取
+        async with SpotPoller(
+            FIELDS, interval=3600, trading_hours_only=False, url=base_url
+        ) as poller:
+            delta_df = await poller.__anext__()
+            assert len(delta_df) == ROWS, len(delta_df)
+            for _ in range(5):
+                delta_df = await poller.poll_once()
+                assert delta_keys(delta_df) == server.changed, server.ticks
+                assert len(delta_df) == int(ROWS * CHANGE_RATE)
+    print(f"变化检测: {server.ticks} 轮, 每轮 {len(server.changed)} 只证券变化")
+
+
+async def check_backpressure(policy: str):
+    server = SpotStubServer(rows=ROWS, change_rate=CHANGE_RATE)
+    async with server as base_url:
+        async with SpotPoller(
+            FIELDS,
+            interval=0.05,
+            queue_size=1,
+            policy=policy,
+            trading_hours_only=False,
+            url=base_url,
+        ) as poller:
+            sizes = []
+            for _ in range(5):
+                # 消费者比轮询慢, 迫使队列溢出
+                await asyncio.sleep(0.3)
+                delta_df = await poller.__anext__()
+                assert not delta_df.duplicated(subset=["f13", "f12"]).any()
+                sizes.append(len(delta_df))
+    assert poller.errors == 0, poller.last_error
+    if policy == "coalesce":
+        # 合并多轮变化后每批行数应超过单轮变化数
+        assert max(sizes[1:]) > int(ROWS * CHANGE_RATE), sizes
+    else:
+        assert poller.dropped > 0
+    print(
+        f"{policy}: {server.ticks} 轮, 每批行数 {sizes}, "
+        f"丢弃 {poller.dropped}, 跳过 {poller.skipped}"
+    )
+
+
+async def main():
+    await check_changes()
+    await check_backpressure("coalesce")
+    await check_backpressure("drop_oldest")
+    print("全部通过")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
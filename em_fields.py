@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/17 14:00
+Desc: 东方财富-clist 接口字段注册表
+记录哪些字段有数据、推断的类型和中文名称, 以 JSON 缓存在本地并按 TTL 过期
+"""
+
+import json
+import math
+import os
+from typing import Dict, List
+
+import pandas as pd
+
+# 沪深京 A 股实时行情可请求的全部字段, 用于首次探测
+CANDIDATE_FIELDS = (
+    'f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f11,f12,f13,f14,f15,f16,f17,f18,f19,f20,f21,f22,f23,f24,f25,f26,f27,f28,f29,f30,f31,f32,f33,f34,f35,f36,f37,f38,f39,f40,f41,f42,f43,f44,f45,f46,f47,f48,f49,f50,f51,f52,f53,f54,f55,f56,f57,f58,f59,f60,f61,f62,f63,f64,f65,f66,f67,f68,f69,f70,f71,f72,f73,f74,f75,f76,f77,f78,f79,f80,f81,f82,f83,f84,f85,f86,f87,f88,f89,f90,f91,f92,f94,f95,f97,f98,f99,f100,f101,f146,f147,f102,f103,f104,f105,f106,f107,f108,f109,f110,f111,f112,f113,f114,f115,f116,f117,f118,f119,f120,f121,f122,f123,f124,f125,f126,f127,f128,f140,f141,f129,f130,f131,f132,f133,f134,f135,f136,f137,f138,f139,f142,f143,f144,f145,f148,f149,f152,f153,f154,f160,f161,f162,f163,f164,f165,f166,f167,f168,f169,f170,f171,f172,f173,f174,f175,f176,f177,f178,f179,f180,f181,f182,f183,f184,f185,f186,f187,f188,f189,f190,f191,f192,f193,f194,f195,f196,f197,f199,f200,f201,f202,f203,f204,f205,f206,f207,f208,f209,f210,f211,f212,f213,f214,f215,f216,f217,f218,f219,f220,f221,f222,f223,f225,f226,f227,f228,f229,f230,f231,f232,f233,f234,f235,f236,f237,f238,f239,f240,f241,f242,f243,f244,f245,f246,f247,f248,f249,f250,f251,f252,f253,f254,f255,f256,f257,f258,f259,f260,f261,f262,f263,f264,f265,f266,f267,f268,f269,f270,f271,f272,f273,f274,f275,f276,f277,f278,f279,f280,f281,f282,f292,f293,f294,f295,f296,f297,f298,f299,f300,f301,f302,f303,f304,f305,f306,f307,f308,f309,f310,f311,f312,f313,f314,f315,f316,f317,f318,f319,f320,f321,f322,f323,f324,f325,f326,f327,f328,f329,f330,f331,f332,f333,f334,f335,f336,f337,f339,f340,f341,f342,f343,f344,f345,f346,f347,f348,f349,f350,f351,f352,f353,f354,f355,f356,f357,f358,f359,f360,f361,f362,f363,f364,f365,f366,f367,f368,f369,f370,f371,f372,f373,f374,f375,f376,f377,f378,f379,f380,f381,f382,f383,f384,f385,f386,f387,f388,f389,f390,f391,f392,f393,f394,f395,f396,f397,f398,f399,f400,f402,f403,f408,f409,f410,f411,f412,f413,f414,f415,f416,f417,f418,f419,f420,f421,f422,f423,f424,f425,f426,f427,f428,f429,f430,f431,f432,f433,f434,f435,f436,f437,f438,f439,f440,f441,f442,f443,f444,f445,f446,f447,f448,f449,f450,f451,f452,f453,f454,f455,f456,f457,f458,f459,f460,f461,f462,f463,f464,f465,f466,f467,f468,f469,f470,f471,f472,f473,f474,f475,f476,f477,f478,f479,f480,f481,f482,f484,f485,f486,f487,f488,f489,f490,f491,f492,f493,f494,f495,f496,f497,f498,f499,f500,f501,f502,f503,f600,f601,f602,f603,f604,f605,f606,f607,f608,f609,f610,f611,f612,f613,f614,f615,f616,f617,f624,f625,f626,f627,f628,f629'
+    ",f1000,f2000,f3000"
+).split(",")
+
+# 用于按证券对齐各批次数据的键字段, 总是请求
+KEY_FIELDS = ["f12", "f13"]
+
+FIELD_NAMES = {
+    "f2": "最新价",
+    "f3": "涨跌幅",
+    "f4": "涨跌额",
+    "f5": "成交量",
+    "f6": "成交额",
+    "f7": "振幅",
+    "f8": "换手率",
+    "f9": "市盈率-动态",
+    "f10": "量比",
+    "f11": "5分钟涨跌",
+    "f12": "代码",
+    "f13": "市场",
+    "f14": "名称",
+    "f15": "最高",
+    "f16": "最低",
+    "f17": "今开",
+    "f18": "昨收",
+    "f20": "总市值",
+    "f21": "流通市值",
+    "f22": "涨速",
+    "f23": "市净率",
+    "f24": "60日涨跌幅",
+    "f25": "年初至今涨跌幅",
+    "f26": "上市日期",
+    "f33": "委比",
+    "f34": "外盘",
+    "f35": "内盘",
+    "f38": "总股本",
+    "f39": "流通股",
+    "f62": "主力净流入",
+    "f66": "超大单净流入",
+    "f69": "超大单净占比",
+    "f72": "大单净流入",
+    "f75": "大单净占比",
+    "f78": "中单净流入",
+    "f81": "中单净占比",
+    "f84": "小单净流入",
+    "f87": "小单净占比",
+    "f100": "所属行业",
+    "f115": "市盈率-TTM",
+    "f184": "主力净占比",
+}
+
+
+# 固定的字段类型, 优先于探测推断; 数值字段一律为 float64, 以便 "-" 解码为 NaN
+DEFAULT_DTYPES = {
+    field: "float64" for field in FIELD_NAMES if field not in ("f12", "f14", "f100")
+}
+DEFAULT_DTYPES.update({"f12": "str", "f13": "int64", "f14": "str", "f100": "str"})
+
+
+def _infer_dtype(series: pd.Series) -> str:
+    values = series[series.notna() & (series != "-")]
+    if values.empty:
+        return ""
+    if not values.map(lambda value: isinstance(value, (int, float))).all():
+        return "str"
+    return "float64"
+
+
+class FieldRegistry:
+    """
+    clist 字段注册表
+    fields 为 {字段: {"dtype": 类型, "name": 中文名称}}, 只包含探测时有数据的字段,
+    类型为 "float64" 或 "str"
+    """
+
+    def __init__(self, fields: Dict[str, Dict[str, str]], probed_at: str):
+        """
+        :param fields: 有数据的字段及其类型和名称
+        :type fields: dict
+        :param probed_at: 探测时间, ISO 格式
+        :type probed_at: str
+        """
+        self.fields = fields
+        self.probed_at = probed_at
+
+    @classmethod
+    def from_frame(cls, temp_df: pd.DataFrame) -> "FieldRegistry":
+        """
+        从一次全字段抓取的结果推断注册表
+        :param temp_df: 全字段实时行情
+        :type temp_df: pandas.DataFrame
+        :return: 字段注册表
+        :rtype: FieldRegistry
+        """
+        fields = {}
+        for column in temp_df.columns:
+            if not (column.startswith("f") and column[1:].isdigit()):
+                continue
+            dtype = _infer_dtype(temp_df[column])
+            if dtype or column in KEY_FIELDS:
+                fields[column] = {
+                    "dtype": dtype or "str",
+                    "name": FIELD_NAMES.get(column, column),
+                }
+        return cls(fields, pd.Timestamp.now().isoformat())
+
+    @classmethod
+    def load(cls, path: str, ttl: float = 7 * 24 * 3600) -> "FieldRegistry":
+        """
+        读取本地缓存的注册表
+        :param path: 缓存文件路径
+        :type path: str
+        :param ttl: 缓存有效期, 秒
+        :type ttl: float
+        :return: 字段注册表; 缓存不存在、无法读取或已过期时返回 None
+        :rtype: FieldRegistry
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                data_json = json.load(f)
+            probed_at = pd.Timestamp(data_json["probed_at"])
+            fields = dict(data_json["fields"])
+        except (OSError, ValueError, KeyError, TypeError):
+            # 截断或损坏的缓存按不存在处理, 重新探测
+            return None
+        if pd.isna(probed_at) or not all(
+            isinstance(info, dict) and "dtype" in info and "name" in info
+            for info in fields.values()
+        ):
+            return None
+        if (pd.Timestamp.now() - probed_at).total_seconds() > ttl:
+            return None
+        return cls(fields, data_json["probed_at"])
+
+    def save(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再替换, 避免中断时留下截断的缓存
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"probed_at": self.probed_at, "fields": self.fields},
+                f,
+                ensure_ascii=False,
+                indent=1,
+            )
+        os.replace(temp_path, path)
+
+    def live_fields(self) -> List[str]:
+        return list(self.fields)
+
+    def dtypes(self) -> Dict[str, str]:
+        return {field: info["dtype"] for field, info in self.fields.items()}
+
+    def names(self) -> Dict[str, str]:
+        return {field: info["name"] for field, info in self.fields.items()}
+
+
+def pack_fields(fields: List[str], batch_size: int = 200) -> List[str]:
+    """
+    把字段均匀分成尽量少的批次, 每批为请求时附带的键字段预留位置
+    :param fields: 需要请求的字段
+    :type fields: list
+    :param batch_size: 每批字段数上限, 含键字段
+    :type batch_size: int
+    :return: 每个批次的 fields 参数
+    :rtype: list
+    """
+    fields = list(dict.fromkeys(fields)) or list(KEY_FIELDS)
+    batch_num = math.ceil(len(fields) / (batch_size - len(KEY_FIELDS)))
+    per_batch = math.ceil(len(fields) / batch_num)
+    return [",".join(fields[i : i + per_batch]) for i in range(0, len(fields), per_batch)]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/17 16:00
+Desc: 东方财富-请求级别的耗时统计
+EmFetcher 及同步请求在每个请求结束后把 RequestStats 交给 hooks 中的每个回调
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+
+@dataclass
+class RequestStats:
+    """
+    单个请求的统计, retries 为重试次数, latency 为最后一次尝试的网络耗时,
+    parse_time 为响应解析耗时, error 为最终失败时的异常
+    """
+
+    url: str
+    start: float
+    end: float
+    latency: float
+    status: int = 0
+    bytes: int = 0
+    retries: int = 0
+    parse_time: float = 0.0
+    error: Exception = None
+
+
+def emit(hooks: List, stats: RequestStats):
+    for hook in hooks or ():
+        hook(stats)
+
+
+class StatsCollector:
+    """
+    收集 RequestStats 并汇总, 可直接作为 hook 传入
+    """
+
+    def __init__(self):
+        self.stats = []
+
+    def __call__(self, stats: RequestStats):
+        self.stats.append(stats)
+
+    def summary(self) -> Dict:
+        """
+        汇总统计
+        :return: 请求数, 失败数, 重试数, 字节数, 时长及耗时分位数
+        :rtype: dict
+        """
+        if not self.stats:
+            return {"requests": 0}
+        latency = np.array([stats.latency for stats in self.stats])
+        wall = max(stats.end for stats in self.stats) - min(
+            stats.start for stats in self.stats
+        )
+        return {
+            "requests": len(self.stats),
+            "errors": sum(stats.error is not None for stats in self.stats),
+            "retries": sum(stats.retries for stats in self.stats),
+            "bytes": sum(stats.bytes for stats in self.stats),
+            "wall": wall,
+            "requests_per_second": len(self.stats) / wall if wall else float("inf"),
+            "latency_mean": float(latency.mean()),
+            "latency_p50": float(np.percentile(latency, 50)),
+            "latency_p95": float(np.percentile(latency, 95)),
+            "latency_max": float(latency.max()),
+            "parse_time": sum(stats.parse_time for stats in self.stats),
+        }
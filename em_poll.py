@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/17 15:00
+Desc: 东方财富网-沪深京 A 股-盘中轮询
+复用一个会话定时抓取所需字段, 逐证券比对前后两次快照只输出变化的行,
+最近 N 次快照保存在数组环形缓冲中
+"""
+
+import asyncio
+import datetime
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from em_fields import KEY_FIELDS, pack_fields
+from my_ak import SPOT_BASE_PARAMS, SPOT_URL, EmFetcher, fetch_clist_async
+
+TRADING_SESSIONS = [
+    (datetime.time(9, 15), datetime.time(11, 30)),
+    (datetime.time(13, 0), datetime.time(15, 0)),
+]
+
+
+def in_trading_hours(now: datetime.datetime = None) -> bool:
+    """
+    是否处于 A 股交易时段 (北京时间工作日 9:15-11:30, 13:00-15:00, 不含节假日)
+    :param now: 北京时间, 默认为当前时间
+    :type now: datetime.datetime
+    :return: 是否处于交易时段
+    :rtype: bool
+    """
+    if now is None:
+        now = pd.Timestamp.now(tz="Asia/Shanghai").to_pydatetime()
+    if now.weekday() >= 5:
+        return False
+    return any(start <= now.time() <= end for start, end in TRADING_SESSIONS)
+
+
+class SnapshotRing:
+    """
+    快照环形缓冲
+    数值字段保存在 [capacity, rows, fields] 的 float64 数组中, 行按证券键 (f13, f12) 固定分配,
+    某次快照中缺失的证券记为 NaN; 查询接口均返回原数组的视图, 不复制数据
+    """
+
+    def __init__(self, capacity: int, fields: List[str], rows: int = 6000):
+        """
+        :param capacity: 保存的快照数量
+        :type capacity: int
+        :param fields: 数值字段
+        :type fields: list
+        :param rows: 预分配的证券行数, 不足时自动扩容
+        :type rows: int
+        """
+        self.capacity = capacity
+        self.fields = list(fields)
+        self.keys = []
+        self._row = {}
+        self._field = {field: i for i, field in enumerate(self.fields)}
+        self._values = np.full((capacity, rows, len(self.fields)), np.nan)
+        self._times = np.full(capacity, np.datetime64("NaT"), dtype="datetime64[ns]")
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def rows(self, keys: List[Tuple]) -> np.ndarray:
+        """
+        证券键对应的行号, 新证券分配新行
+        :param keys: 证券键 (f13, f12)
+        :type keys: list
+        :return: 行号
+        :rtype: numpy.ndarray
+        """
+        rows = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            row = self._row.get(key)
+            if row is None:
+                row = self._row[key] = len(self.keys)
+                self.keys.append(key)
+            rows[i] = row
+        if len(self.keys) > self._values.shape[1]:
+            values = np.full(
+                (self.capacity, len(self.keys) * 2, len(self.fields)), np.nan
+            )
+            values[:, : self._values.shape[1]] = self._values
+            self._values = values
+        return rows
+
+    def push(self, rows: np.ndarray, values: np.ndarray, timestamp: np.datetime64):
+        """
+        写入一次快照, 容量已满时覆盖最早的快照
+        :param rows: 行号, 由 rows() 得到
+        :type rows: numpy.ndarray
+        :param values: [len(rows), fields] 的数值
+        :type values: numpy.ndarray
+        :param timestamp: 快照时间
+        :type timestamp: numpy.datetime64
+        """
+        slot = self._values[self._head]
+        slot.fill(np.nan)
+        slot[rows] = values
+        self._times[self._head] = timestamp
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def latest(self, k: int = 0) -> np.ndarray:
+        """
+        倒数第 k 次快照, k=0 为最新
+        :param k: 倒数序号
+        :type k: int
+        :return: [rows, fields] 视图, 行顺序与 keys 一致
+        :rtype: numpy.ndarray
+        """
+        if not 0 <= k < self._size:
+            raise IndexError(f"snapshot {k} out of range, {self._size} stored")
+        return self._values[(self._head - 1 - k) % self.capacity, : len(self.keys)]
+
+    def history(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        按时间先后排列的全部快照, 由最多两段视图组成
+        :return: [(时间, [n, rows, fields] 数值), ...]
+        :rtype: list
+        """
+        start = (self._head - self._size) % self.capacity
+        rows = len(self.keys)
+        if start + self._size <= self.capacity:
+            spans = [(start, start + self._size)]
+        else:
+            spans = [(start, self.capacity), (0, self._head)]
+        return [(self._times[a:b], self._values[a:b, :rows]) for a, b in spans]
+
+    def field(self, field: str, k: int = 0) -> np.ndarray:
+        """
+        倒数第 k 次快照中某字段的全部证券数值, 视图
+        """
+        return self.latest(k)[:, self._field[field]]
+
+
+class SpotPoller:
+    """
+    沪深京 A 股实时行情轮询
+    按固定间隔抓取, 上一轮尚未完成时跳过错过的轮次, 不会堆积请求;
+    变化的行放入有界队列, 消费者跟不上时按 policy 处理:
+    coalesce 把未取走的变化与新变化合并, 每只证券只保留最新值;
+    drop_oldest 丢弃最早未取走的变化
+    """
+
+    def __init__(
+        self,
+        fields: List[str],
+        interval: float = 3.0,
+        history: int = 100,
+        queue_size: int = 1,
+        policy: str = "coalesce",
+        trading_hours_only: bool = True,
+        url: str = SPOT_URL,
+        base_params: dict = None,
+        concurrency: int = 16,
+        retries: int = 1,
+        timeout: float = 10,
+    ):
+        """
+        :param fields: 需要跟踪的数值字段, 如 ["f2", "f3", "f5"]
+        :type fields: list
+        :param interval: 轮询间隔, 秒
+        :type interval: float
+        :param history: 环形缓冲保存的快照数量
+        :type history: int
+        :param queue_size: 未取走的变化最多保留的批数
+        :type queue_size: int
+        :param policy: choice of {"coalesce", "drop_oldest"}
+        :type policy: str
+        :param trading_hours_only: 是否只在交易时段抓取
+        :type trading_hours_only: bool
+        :param url: 请求地址, 可指向本地桩服务器
+        :type url: str
+        :param base_params: 基础请求参数, 默认为沪深京 A 股
+        :type base_params: dict
+        :param concurrency: 全局并发请求上限
+        :type concurrency: int
+        :param retries: 单个请求失败后的重试次数
+        :type retries: int
+        :param timeout: 单个请求超时时间
+        :type timeout: float
+        """
+        if policy not in ("coalesce", "drop_oldest"):
+            raise ValueError(f"unknown policy: {policy}")
+        self.fields = [field for field in dict.fromkeys(fields) if field not in KEY_FIELDS]
+        self.interval = interval
+        self.policy = policy
+        self.trading_hours_only = trading_hours_only
+        self.url = url
+        self.base_params = base_params or SPOT_BASE_PARAMS
+        self.ring = SnapshotRing(history, self.fields)
+        self.polls = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self._field_batches = pack_fields(self.fields)
+        self._dtypes = {field: "float64" for field in self.fields}
+        self._dtypes.update({"f12": "str", "f13": "int64"})
+        self._fetcher = EmFetcher(concurrency=concurrency, retries=retries, timeout=timeout)
+        self.queue_size = queue_size
+        self._queue = None
+        self._task = None
+
+    async def __aenter__(self):
+        await self._fetcher.__aenter__()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await self._fetcher.__aexit__(*exc_info)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> pd.DataFrame:
+        return await self._queue.get()
+
+    async def poll_once(self) -> pd.DataFrame:
+        """
+        抓取一次快照, 写入环形缓冲并返回相对上一次快照变化的行
+        :return: 变化的行, 含 f13, f12 及跟踪字段; 首次抓取返回全部行
+        :rtype: pandas.DataFrame
+        """
+        temp_df = await fetch_clist_async(
+            self._fetcher,
+            self.url,
+            self.base_params,
+            self._field_batches,
+            progress=False,
+            dtypes=self._dtypes,
+        )
+        timestamp = pd.Timestamp.now().to_datetime64()
+        values = np.empty((len(temp_df), len(self.fields)))
+        for i, field in enumerate(self.fields):
+            values[:, i] = pd.to_numeric(temp_df[field], errors="coerce").to_numpy(
+                np.float64
+            )
+        rows = self.ring.rows(list(zip(temp_df["f13"], temp_df["f12"])))
+        if len(self.ring):
+            previous = self.ring.latest()[rows]
+            same = (previous == values) | (np.isnan(previous) & np.isnan(values))
+            changed = ~same.all(axis=1)
+        else:
+            changed = np.ones(len(rows), dtype=bool)
+        self.ring.push(rows, values, timestamp)
+        self.polls += 1
+        delta_df = pd.DataFrame(values[changed], columns=self.fields)
+        delta_df.insert(0, "f12", temp_df["f12"].to_numpy()[changed])
+        delta_df.insert(0, "f13", temp_df["f13"].to_numpy()[changed])
+        return delta_df
+
+    def _offer(self, delta_df: pd.DataFrame):
+        if self._queue.full():
+            pending_df = self._queue.get_nowait()
+            if self.policy == "coalesce":
+                delta_df = pd.concat([pending_df, delta_df], ignore_index=True)
+                delta_df = delta_df.drop_duplicates(subset=KEY_FIELDS, keep="last")
+                delta_df = delta_df.reset_index(drop=True)
+            else:
+                self.dropped += 1
+        self._queue.put_nowait(delta_df)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while True:
+            if not self.trading_hours_only or in_trading_hours():
+                try:
+                    delta_df = await self.poll_once()
+                except Exception as e:
+                    self.errors += 1
+                    self.last_error = e
+                else:
+                    if not delta_df.empty:
+                        self._offer(delta_df)
+            next_time += self.interval
+            now = loop.time()
+            if now > next_time:
+                # 本轮耗时超过间隔, 跳过错过的轮次而不是连续补抓
+                missed = int((now - next_time) // self.interval) + 1
+                self.skipped += missed
+                next_time += missed * self.interval
+            await asyncio.sleep(next_time - now)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/17 16:00
+Desc: 东方财富-响应录制与本地回放
+ResponseRecorder 把真实响应按请求路径和参数保存到目录, ReplayServer 在本地以 aiohttp
+回放这些响应, 并可模拟延迟、错误和限流, 用于离线基准测试;
+SpotStubServer 生成逐轮变化的 clist 行情, 用于离线测试盘中轮询
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from aiohttp import web
+
+
+def request_key(url: str, params: Dict) -> str:
+    """
+    请求的录制键, 只取路径和参数, 与主机无关
+    :param url: 请求地址
+    :type url: str
+    :param params: 请求参数
+    :type params: dict
+    :return: 录制键
+    :rtype: str
+    """
+    query = urlencode(sorted((str(key), str(value)) for key, value in params.items()))
+    return hashlib.sha1(f"{urlsplit(url).path}?{query}".encode()).hexdigest()
+
+
+class ResponseRecorder:
+    """
+    响应录制, 每个响应保存为 <录制键>.json, 请求信息追加到 index.jsonl
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: 录制目录
+        :type directory: str
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, url: str, params: Dict, body: bytes):
+        key = request_key(url, params)
+        with open(os.path.join(self.directory, f"{key}.json"), "wb") as f:
+            f.write(body)
+        with open(os.path.join(self.directory, "index.jsonl"), "a", encoding="utf-8") as f:
+            f.write(
+                json.dumps(
+                    {"key": key, "url": url, "params": params, "bytes": len(body)},
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+
+
+class ReplayServer:
+    """
+    本地回放服务器
+    未录制的请求返回 404; error_rate 的比例返回 500; 每秒请求数超过 rate 时返回 429
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate: float = None,
+        seed: int = 0,
+    ):
+        """
+        :param directory: 录制目录
+        :type directory: str
+        :param latency: 每个响应的固定延迟, 秒
+        :type latency: float
+        :param jitter: 在固定延迟之上增加的随机延迟上限, 秒
+        :type jitter: float
+        :param error_rate: 返回 500 的比例
+        :type error_rate: float
+        :param rate: 每秒最多处理的请求数, None 表示不限流
+        :type rate: float
+        :param seed: 随机种子
+        :type seed: int
+        """
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate = rate
+        self.requests = 0
+        self.missing = 0
+        self.throttled = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._window_start = 0.0
+        self._window_count = 0
+        self._runner = None
+        self._loop = None
+        self._thread = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        params = dict(request.query)
+        if request.method == "POST":
+            params.update(await request.post())
+        if self.rate:
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            if self._window_count > self.rate:
+                self.throttled += 1
+                return web.Response(status=429)
+        await asyncio.sleep(self.latency + self._random.uniform(0, self.jitter))
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=500)
+        body = self._body(request.path, params)
+        if body is None:
+            self.missing += 1
+            return web.Response(status=404)
+        return web.Response(body=body, content_type="application/json")
+
+    def _body(self, path: str, params: Dict) -> Optional[bytes]:
+        path = os.path.join(self.directory, f"{request_key(path, params)}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        启动服务器
+        :return: 服务器地址, 如 http://127.0.0.1:50123
+        :rtype: str
+        """
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    async def __aenter__(self) -> str:
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        在后台线程中启动服务器, 供同步调用的抓取函数使用
+        :return: 服务器地址
+        :rtype: str
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        return asyncio.run_coroutine_threadsafe(
+            self.start(host, port), self._loop
+        ).result()
+
+    def stop_thread(self):
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class SpotStubServer(ReplayServer):
+    """
+    clist 行情桩服务器
+    按 pn, pz 和 fields 参数生成 rows 只证券的分页数据, f12 为代码, f13 为市场, f14 为名称,
+    其余字段为数值; 同一批字段的第一页被再次请求时视为新一轮轮询开始, 此时随机选出
+    change_rate 比例的证券并改变其全部数值字段, 本轮变化的证券键 (f13, f12) 记在 changed 中
+    """
+
+    def __init__(
+        self,
+        rows: int = 500,
+        change_rate: float = 0.1,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate: float = None,
+        seed: int = 0,
+    ):
+        """
+        :param rows: 证券数量
+        :type rows: int
+        :param change_rate: 每轮数值发生变化的证券比例
+        :type change_rate: float
+        :param latency: 每个响应的固定延迟, 秒
+        :type latency: float
+        :param jitter: 在固定延迟之上增加的随机延迟上限, 秒
+        :type jitter: float
+        :param error_rate: 返回 500 的比例
+        :type error_rate: float
+        :param rate: 每秒最多处理的请求数, None 表示不限流
+        :type rate: float
+        :param seed: 随机种子
+        :type seed: int
+        """
+        super().__init__("", latency, jitter, error_rate, rate, seed)
+        self.rows = rows
+        self.change_rate = change_rate
+        self.ticks = 0
+        self.changed = set()
+        self._data = random.Random(seed)
+        self._values = {}
+        self._seen = set()
+
+    def _column(self, field: str) -> List[float]:
+        column = self._values.get(field)
+        if column is None:
+            column = self._values[field] = [
+                round(self._data.uniform(1, 100), 2) for _ in range(self.rows)
+            ]
+        return column
+
+    def advance(self):
+        """
+        进入下一轮, 改变 change_rate 比例证券的全部数值字段
+        """
+        self.ticks += 1
+        rows = self._data.sample(range(self.rows), int(self.rows * self.change_rate))
+        for column in self._values.values():
+            for row in rows:
+                column[row] = round(column[row] + self._data.choice((-1, 1)) * 0.01, 2)
+        self.changed = {(row % 2, f"{row:06d}") for row in rows}
+
+    def _body(self, path: str, params: Dict) -> Optional[bytes]:
+        fields = params.get("fields", "f12,f13").split(",")
+        page = int(params.get("pn", 1))
+        per_page_num = int(params.get("pz", 100))
+        if page == 1:
+            if params.get("fields") in self._seen:
+                self.advance()
+                self._seen.clear()
+            self._seen.add(params.get("fields"))
+        diff = []
+        for row in range((page - 1) * per_page_num, min(page * per_page_num, self.rows)):
+            item = {}
+            for field in fields:
+                if field == "f12":
+                    item[field] = f"{row:06d}"
+                elif field == "f13":
+                    item[field] = row % 2
+                elif field == "f14":
+                    item[field] = f"股票{row}"
+                else:
+                    item[field] = self._column(field)[row]
+            diff.append(item)
+        data = {"total": self.rows, "diff": diff} if diff else None
+        return json.dumps({"rc": 0, "data": data}, ensure_ascii=False).encode()
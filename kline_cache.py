@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/17 11:00
+Desc: 东方财富网-沪深京 A 股-历史行情本地增量缓存
+每个 (股票代码, 周期, 复权方式) 存为一个 Parquet 文件, 命中缓存时只请求最近的新数据
+"""
+
+import os
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ["开盘", "收盘", "最高", "最低"]
+
+
+class KlineCache:
+    """
+    历史行情增量缓存
+    不复权数据从倒数第二根 K 线的次日开始续传, 最后一根 K 线可能是盘中或未走完的周/月线,
+    总是重新获取; 前/后复权数据额外向前重叠 overlap 根 K 线, 与缓存比对价格,
+    不一致说明复权因子已变化, 此时整段重建
+    """
+
+    def __init__(self, root: str, overlap: int = 5):
+        """
+        :param root: 缓存根目录
+        :type root: str
+        :param overlap: 复权数据续传时与缓存重叠比对的 K 线数量
+        :type overlap: int
+        """
+        self.root = root
+        self.overlap = overlap
+
+    def path(self, symbol: str, period: str, adjust: str) -> str:
+        return os.path.join(self.root, period, adjust or "none", f"{symbol}.parquet")
+
+    def load(self, symbol: str, period: str, adjust: str) -> Optional[pd.DataFrame]:
+        path = self.path(symbol, period, adjust)
+        if not os.path.exists(path):
+            return None
+        cached = pd.read_parquet(path)
+        # 兼容以 date 对象保存的旧缓存
+        cached["日期"] = pd.to_datetime(cached["日期"])
+        return cached
+
+    def save(self, temp_df: pd.DataFrame, symbol: str, period: str, adjust: str):
+        path = self.path(symbol, period, adjust)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再替换, 避免中断时留下损坏的缓存
+        temp_path = f"{path}.tmp"
+        temp_df.to_parquet(temp_path, index=False)
+        os.replace(temp_path, path)
+
+    def _window(self, adjust: str) -> int:
+        return self.overlap if adjust else 1
+
+    def resume_date(self, cached: Optional[pd.DataFrame], adjust: str) -> Optional[str]:
+        """
+        续传的开始日期
+        :param cached: 缓存数据
+        :type cached: pandas.DataFrame
+        :param adjust: 复权方式
+        :type adjust: str
+        :return: 开始日期, 如 20250418; None 表示需要全量获取
+        :rtype: str
+        """
+        window = self._window(adjust)
+        if cached is None or len(cached) <= window:
+            return None
+        anchor = pd.Timestamp(cached["日期"].iloc[-(window + 1)])
+        return (anchor + pd.Timedelta(days=1)).strftime("%Y%m%d")
+
+    def merge(
+        self, cached: pd.DataFrame, new_df: pd.DataFrame, adjust: str
+    ) -> Optional[pd.DataFrame]:
+        """
+        合并缓存与续传数据
+        :param cached: 缓存数据
+        :type cached: pandas.DataFrame
+        :param new_df: 从 resume_date 开始获取的数据
+        :type new_df: pandas.DataFrame
+        :param adjust: 复权方式
+        :type adjust: str
+        :return: 合并后的数据; None 表示复权因子已变化, 需要全量重建
+        :rtype: pandas.DataFrame
+        """
+        if new_df.empty:
+            return cached
+        window = self._window(adjust)
+        dates = pd.to_datetime(cached["日期"])
+        anchor = dates.iloc[-(window + 1)]
+        if adjust:
+            # 最后一根 K 线可能尚未走完, 只比对其之前的重叠部分
+            overlap_df = cached[(dates > anchor).to_numpy()].iloc[:-1]
+            check_df = overlap_df[["日期"] + PRICE_COLUMNS].merge(
+                new_df[["日期"] + PRICE_COLUMNS], on="日期", how="left"
+            )
+            if not np.allclose(
+                check_df[[f"{column}_x" for column in PRICE_COLUMNS]].to_numpy(float),
+                check_df[[f"{column}_y" for column in PRICE_COLUMNS]].to_numpy(float),
+                equal_nan=False,
+            ):
+                return None
+        return pd.concat(
+            [cached[(dates <= anchor).to_numpy()], new_df], ignore_index=True
+        )
+
+    def update(
+        self,
+        symbol: str,
+        period: str,
+        adjust: str,
+        fetch: Callable[[str], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """
+        增量更新缓存并返回完整历史行情
+        :param symbol: 股票代码
+        :type symbol: str
+        :param period: choice of {'daily', 'weekly', 'monthly'}
+        :type period: str
+        :param adjust: choice of {"qfq": "前复权", "hfq": "后复权", "": "不复权"}
+        :type adjust: str
+        :param fetch: 按开始日期获取行情的函数
+        :type fetch: callable
+        :return: 完整历史行情
+        :rtype: pandas.DataFrame
+        """
+        cached = self.load(symbol, period, adjust)
+        beg = self.resume_date(cached, adjust)
+        temp_df = None
+        if beg is not None:
+            temp_df = self.merge(cached, fetch(beg), adjust)
+            if temp_df is cached:
+                return cached
+        if temp_df is None:
+            temp_df = fetch("19700101")
+        if not temp_df.empty:
+            self.save(temp_df, symbol, period, adjust)
+        return temp_df
+
+    async def update_async(
+        self,
+        symbol: str,
+        period: str,
+        adjust: str,
+        fetch: Callable[[str], Awaitable[pd.DataFrame]],
+    ) -> pd.DataFrame:
+        """
+        增量更新缓存并返回完整历史行情, fetch 为协程函数的版本
+        :param symbol: 股票代码
+        :type symbol: str
+        :param period: choice of {'daily', 'weekly', 'monthly'}
+        :type period: str
+        :param adjust: choice of {"qfq": "前复权", "hfq": "后复权", "": "不复权"}
+        :type adjust: str
+        :param fetch: 按开始日期获取行情的协程函数
+        :type fetch: callable
+        :return: 完整历史行情
+        :rtype: pandas.DataFrame
+        """
+        cached = self.load(symbol, period, adjust)
+        beg = self.resume_date(cached, adjust)
+        temp_df = None
+        if beg is not None:
+            temp_df = self.merge(cached, await fetch(beg), adjust)
+            if temp_df is cached:
+                return cached
+        if temp_df is None:
+            temp_df = await fetch("19700101")
+        if not temp_df.empty:
+            self.save(temp_df, symbol, period, adjust)
+        return temp_df
+
+
+def filter_dates(temp_df: pd.DataFrame, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    按日期区间截取历史行情
+    :param temp_df: 历史行情
+    :type temp_df: pandas.DataFrame
+    :param start_date: 开始日期
+    :type start_date: str
+    :param end_date: 结束日期
+    :type end_date: str
+    :return: 截取后的历史行情
+    :rtype: pandas.DataFrame
+    """
+    if temp_df.empty:
+        return temp_df
+    dates = pd.to_datetime(temp_df["日期"])
+    mask = (dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))
+    return temp_df[mask.to_numpy()].reset_index(drop=True)
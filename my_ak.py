@@ -6,9 +6,201 @@ Desc: 东方财富网-行情首页-沪深京 A 股
 https://quote.eastmoney.com/
 """
 
+import asyncio
+import io
+import json
+import math
+import random
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
 import pandas as pd
 import requests
 
+from akshare.utils.tqdm import get_tqdm
+
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+from em_fields import CANDIDATE_FIELDS, DEFAULT_DTYPES, FieldRegistry, pack_fields
+from em_metrics import RequestStats, StatsCollector, emit
+from em_replay import ResponseRecorder
+from kline_cache import KlineCache, filter_dates
+from snapshot_store import write_snapshot
+
+
+KLINE_URL = "https://push2his.eastmoney.com/api/qt/stock/kline/get"
+KLINE_COLUMNS = [
+    "日期",
+    "开盘",
+    "收盘",
+    "最高",
+    "最低",
+    "成交量",
+    "成交额",
+    "振幅",
+    "涨跌幅",
+    "涨跌额",
+    "换手率",
+]
+
+
+def em_secid(symbol: str) -> str:
+    """
+    东方财富-证券代码转 secid
+    沪市 (6 开头及 900 开头的 B 股) 市场代码为 1, 深市及北交所 (4, 8, 92 开头) 为 0,
+    也支持 sh600000, 600000.SH, bj430047 等带交易所前后缀的写法
+    :param symbol: 股票代码
+    :type symbol: str
+    :return: secid, 如 1.600000
+    :rtype: str
+    """
+    code = symbol.strip().lower()
+    exchange = ""
+    if code[:2] in ("sh", "sz", "bj"):
+        exchange, code = code[:2], code[2:]
+    elif code[-3:] in (".sh", ".sz", ".bj"):
+        exchange, code = code[-2:], code[:-3]
+    if exchange:
+        market_code = 1 if exchange == "sh" else 0
+    elif code.startswith(("92", "4", "8")):
+        market_code = 0
+    else:
+        market_code = 1 if code.startswith(("6", "900")) else 0
+    return f"{market_code}.{code}"
+
+
+def _kline_params(
+    symbol: str, period: str, start_date: str, end_date: str, adjust: str
+) -> Dict:
+    adjust_dict = {"qfq": "1", "hfq": "2", "": "0"}
+    period_dict = {"daily": "101", "weekly": "102", "monthly": "103"}
+    return {
+        "fields1": "f1,f2",
+        "fields2": "f76,f77",
+        "ut": "7eea3edcaed734bea9cbfc24409ed989",
+        "klt": period_dict[period],
+        "fqt": adjust_dict[adjust],
+        "secid": em_secid(symbol),
+        "beg": start_date,
+        "end": end_date,
+    }
+
+
+def _parse_klines(
+    data_json: Dict, symbol: str, price_dtype: str = "float64"
+) -> pd.DataFrame:
+    """
+    东方财富-K 线解析
+    klines 拼接后交给 C 解析器一次性转换为定型列: 日期为 datetime64, 成交量为 int64,
+    成交额为 float64, 其余价格及比率列为 price_dtype, 股票代码为 category
+    :param data_json: K 线接口返回的 JSON
+    :type data_json: dict
+    :param symbol: 股票代码
+    :type symbol: str
+    :param price_dtype: choice of {"float64", "float32"}
+    :type price_dtype: str
+    :return: 每日行情
+    :rtype: pandas.DataFrame
+    """
+    if not (data_json["data"] and data_json["data"]["klines"]):
+        return pd.DataFrame()
+    klines = data_json["data"]["klines"]
+    dtype_dict = {column: price_dtype for column in KLINE_COLUMNS[1:]}
+    dtype_dict.update({"成交量": "float64", "成交额": "float64"})
+    temp_df = pd.read_csv(
+        io.StringIO("\n".join(klines)),
+        header=None,
+        names=KLINE_COLUMNS,
+        usecols=range(len(KLINE_COLUMNS)),
+        dtype=dtype_dict,
+        na_values=["-"],
+        parse_dates=["日期"],
+    )
+    if not temp_df["成交量"].hasnans:
+        temp_df["成交量"] = temp_df["成交量"].astype("int64")
+    temp_df.insert(
+        1,
+        "股票代码",
+        pd.Categorical.from_codes(np.zeros(len(temp_df), dtype=np.int8), [symbol]),
+    )
+    return temp_df
+
+
+def _cast_prices(temp_df: pd.DataFrame, price_dtype: str) -> pd.DataFrame:
+    """
+    把价格及比率列转为 price_dtype
+    """
+    if price_dtype == "float64" or temp_df.empty:
+        return temp_df
+    columns = [column for column in KLINE_COLUMNS[1:] if column not in ("成交量", "成交额")]
+    return temp_df.astype({column: price_dtype for column in columns})
+
+
+def _post_json_sync(
+    url: str,
+    params: Dict,
+    timeout: float = None,
+    hooks: List[Callable[[RequestStats], None]] = None,
+    recorder: ResponseRecorder = None,
+    retries: int = 3,
+    backoff: float = 0.5,
+) -> Dict:
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        status = 0
+        content = b""
+        try:
+            start = time.perf_counter()
+            r = requests.post(url, data=params, timeout=timeout)
+            status = r.status_code
+            r.raise_for_status()
+            content = r.content
+            end = time.perf_counter()
+            if recorder is not None:
+                recorder.record(url, params, content)
+            data_json = json_loads(content)
+        except (requests.RequestException, ValueError) as e:
+            if attempt == retries:
+                end = time.perf_counter()
+                emit(
+                    hooks,
+                    RequestStats(
+                        url,
+                        start,
+                        end,
+                        end - start,
+                        status,
+                        len(content),
+                        attempt,
+                        error=e,
+                    ),
+                )
+                raise
+        else:
+            parse_time = time.perf_counter() - end
+            emit(
+                hooks,
+                RequestStats(
+                    url,
+                    start,
+                    end + parse_time,
+                    end - start,
+                    status,
+                    len(content),
+                    attempt,
+                    parse_time,
+                ),
+            )
+            return data_json
+        time.sleep(backoff * 2**attempt * (1 + random.random()))
+
 
 def stock_zh_a_hist(
     symbol: str = "000001",
@@ -17,6 +209,12 @@ def stock_zh_a_hist(
     end_date: str = "20500101",
     adjust: str = "",
     timeout: float = None,
+    cache_dir: str = None,
+    price_dtype: str = "float64",
+    url: str = KLINE_URL,
+    hooks: List[Callable[[RequestStats], None]] = None,
+    recorder: ResponseRecorder = None,
+    retries: int = 3,
 ) -> pd.DataFrame:
     """
     东方财富网-行情首页-沪深京 A 股-每日行情
@@ -33,87 +231,475 @@ def stock_zh_a_hist(
     :type adjust: str
     :param timeout: choice of None or a positive float number
     :type timeout: float
+    :param cache_dir: 本地缓存目录, 设置后只增量获取缓存之后的新数据
+    :type cache_dir: str
+    :param price_dtype: choice of {"float64", "float32"}
+    :type price_dtype: str
+    :param url: 请求地址, 可指向本地回放服务器
+    :type url: str
+    :param hooks: 每个请求结束后以 RequestStats 调用的回调
+    :type hooks: list
+    :param recorder: 响应录制器, 用于离线回放
+    :type recorder: ResponseRecorder
+    :param retries: 请求失败或响应无法解析时的重试次数
+    :type retries: int
     :return: 每日行情
     :rtype: pandas.DataFrame
     """
-    market_code = 1 if symbol.startswith("6") else 0
-    adjust_dict = {"qfq": "1", "hfq": "2", "": "0"}
-    period_dict = {"daily": "101", "weekly": "102", "monthly": "103"}
-    url = "https://push2his.eastmoney.com/api/qt/stock/kline/get"
 
-    flist = []
-    for i in range(1001):
-        flist.append(f'f{i}')
-    x= ','.join(flist)
-    
-    params = {
-        "fields1": f"f1,f2",
-        "fields2": f"f76,f77",
-        "ut": "7eea3edcaed734bea9cbfc24409ed989",
-        "klt": period_dict[period],
-        "fqt": adjust_dict[adjust],
-        "secid": f"{market_code}.{symbol}",
-        "beg": start_date,
-        "end": end_date,
+    # 缓存统一以 float64 保存, 不随 price_dtype 变化
+    dtype = price_dtype if cache_dir is None else "float64"
+
+    def fetch(beg, end="20500101"):
+        params = _kline_params(symbol, period, beg, end, adjust)
+        data_json = _post_json_sync(url, params, timeout, hooks, recorder, retries)
+        return _parse_klines(data_json, symbol, dtype)
+
+    if cache_dir is None:
+        return fetch(start_date, end_date)
+    temp_df = KlineCache(cache_dir).update(symbol, period, adjust, fetch)
+    return _cast_prices(filter_dates(temp_df, start_date, end_date), price_dtype)
+
+
+class EmFetcher:
+    """
+    东方财富-异步抓取调度器
+    所有请求共用一个带连接池的 aiohttp.ClientSession, 由全局信号量限制并发,
+    单个请求失败时按指数退避重试
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 16,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 150,
+        rate: float = None,
+        hooks: List[Callable[[RequestStats], None]] = None,
+        recorder: ResponseRecorder = None,
+    ):
+        """
+        :param concurrency: 全局并发请求上限
+        :type concurrency: int
+        :param retries: 单个请求失败后的重试次数
+        :type retries: int
+        :param backoff: 首次重试前的等待秒数, 之后每次翻倍
+        :type backoff: float
+        :param timeout: 单个请求超时时间
+        :type timeout: float
+        :param rate: 每秒最多发起的请求数, None 表示不限速
+        :type rate: float
+        :param hooks: 每个请求结束后以 RequestStats 调用的回调
+        :type hooks: list
+        :param recorder: 响应录制器, 用于离线回放
+        :type recorder: ResponseRecorder
+        """
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.rate = rate
+        self.hooks = hooks
+        self.recorder = recorder
+        self._session = None
+        self._semaphore = None
+        self._rate_lock = None
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._rate_lock = asyncio.Lock()
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+        self._session = None
+
+    async def _throttle(self):
+        if not self.rate:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._rate_lock:
+            delay = self._next_start - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = max(self._next_start, loop.time()) + 1 / self.rate
+
+    async def post(
+        self, url: str, params: Dict, parse: Callable[[bytes], Any] = json_loads
+    ) -> Any:
+        """
+        发送一个 POST 请求并解析响应, 失败时按退避策略重试
+        :param url: 请求地址
+        :type url: str
+        :param params: 请求参数
+        :type params: dict
+        :param parse: 响应解析函数, 输入为响应原始字节
+        :type parse: callable
+        :return: 解析结果
+        :rtype: object
+        """
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            status = 0
+            body = b""
+            try:
+                async with self._semaphore:
+                    await self._throttle()
+                    start = time.perf_counter()
+                    async with self._session.post(url, data=params) as response:
+                        status = response.status
+                        response.raise_for_status()
+                        body = await response.read()
+                end = time.perf_counter()
+                if self.recorder is not None:
+                    self.recorder.record(url, params, body)
+                # 繁忙页面、缺少 data 等异常响应与网络错误一样重试
+                result = parse(body)
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                ValueError,
+                KeyError,
+                TypeError,
+            ) as e:
+                if attempt == self.retries:
+                    end = time.perf_counter()
+                    emit(
+                        self.hooks,
+                        RequestStats(
+                            url,
+                            start,
+                            end,
+                            end - start,
+                            status,
+                            len(body),
+                            attempt,
+                            error=e,
+                        ),
+                    )
+                    raise
+            else:
+                parse_time = time.perf_counter() - end
+                emit(
+                    self.hooks,
+                    RequestStats(
+                        url,
+                        start,
+                        end + parse_time,
+                        end - start,
+                        status,
+                        len(body),
+                        attempt,
+                        parse_time,
+                    ),
+                )
+                return result
+            # 退避等待放在信号量之外, 不占用并发名额
+            await asyncio.sleep(self.backoff * 2**attempt * (1 + random.random()))
+
+    async def post_json(self, url: str, params: Dict) -> Dict:
+        """
+        发送一个 POST 请求并返回解析后的 JSON, 失败时按退避策略重试
+        :param url: 请求地址
+        :type url: str
+        :param params: 请求参数
+        :type params: dict
+        :return: 响应 JSON
+        :rtype: dict
+        """
+        return await self.post(url, params)
+
+
+def _buffer_dtypes(fields: List[str], dtypes: Dict[str, str] = None) -> Dict:
+    dtypes = dtypes or {}
+    return {
+        field: object if dtypes.get(field, "str") == "str" else np.dtype(dtypes[field])
+        for field in fields
     }
-    r = requests.post(url, data=params, timeout=timeout)
-    data_json = r.json()
-    if not (data_json["data"] and data_json["data"]["klines"]):
-        return pd.DataFrame()
-    temp_df = pd.DataFrame([item.split(",") for item in data_json["data"]["klines"]])
-    temp_df["股票代码"] = symbol
-    temp_df.columns = [
-        "日期",
-        "开盘",
-        "收盘",
-        "最高",
-        "最低",
-        "成交量",
-        "成交额",
-        "振幅",
-        "涨跌幅",
-        "涨跌额",
-        "换手率",
-        "股票代码",
-    ]
-    temp_df["日期"] = pd.to_datetime(temp_df["日期"], errors="coerce").dt.date
-    temp_df["开盘"] = pd.to_numeric(temp_df["开盘"], errors="coerce")
-    temp_df["收盘"] = pd.to_numeric(temp_df["收盘"], errors="coerce")
-    temp_df["最高"] = pd.to_numeric(temp_df["最高"], errors="coerce")
-    temp_df["最低"] = pd.to_numeric(temp_df["最低"], errors="coerce")
-    temp_df["成交量"] = pd.to_numeric(temp_df["成交量"], errors="coerce")
-    temp_df["成交额"] = pd.to_numeric(temp_df["成交额"], errors="coerce")
-    temp_df["振幅"] = pd.to_numeric(temp_df["振幅"], errors="coerce")
-    temp_df["涨跌幅"] = pd.to_numeric(temp_df["涨跌幅"], errors="coerce")
-    temp_df["涨跌额"] = pd.to_numeric(temp_df["涨跌额"], errors="coerce")
-    temp_df["换手率"] = pd.to_numeric(temp_df["换手率"], errors="coerce")
-    temp_df = temp_df[
-        [
-            "日期",
-            "股票代码",
-            "开盘",
-            "收盘",
-            "最高",
-            "最低",
-            "成交量",
-            "成交额",
-            "振幅",
-            "涨跌幅",
-            "涨跌额",
-            "换手率",
-        ]
+
+
+def decode_clist_page(body: bytes) -> Tuple[int, List[Dict]]:
+    """
+    东方财富-clist 单页响应解码
+    只解析 JSON 并取出 diff 记录, 作为 EmFetcher.post 的 parse 时格式异常的响应会被重试;
+    记录由 ClistAssembler.add_page 逐字段直接写入定型列
+    :param body: 响应原始字节
+    :type body: bytes
+    :return: (总记录数, diff 记录)
+    :rtype: tuple
+    """
+    data = json_loads(body)["data"] or {}
+    return data.get("total", 0), data.get("diff") or []
+
+
+class ClistAssembler:
+    """
+    东方财富-clist 分页及分批结果的列式拼装
+    每页数据直接写入预分配的定型列数组, 行位置按证券键 (f13, f12) 对齐,
+    行顺序按首次出现的页码及页内位置确定, 与页面完成顺序无关
+    """
+
+    key_fields = ("f13", "f12")
+
+    def __init__(
+        self,
+        fields: List[str],
+        per_page_num: int,
+        total_page: int,
+        dtypes: Dict[str, str] = None,
+    ):
+        """
+        :param fields: 需要输出的全部字段, 按输出顺序排列
+        :type fields: list
+        :param per_page_num: 每页记录数
+        :type per_page_num: int
+        :param total_page: 总页数
+        :type total_page: int
+        :param dtypes: 字段类型, 取值为 "str" 或 numpy dtype 名称, 缺省的字段为 object 列
+        :type dtypes: dict
+        """
+        self.fields = list(dict.fromkeys(fields))
+        self.per_page_num = per_page_num
+        self.dtypes = _buffer_dtypes(self.fields, dtypes)
+        self._capacity = per_page_num * total_page
+        self._columns = {
+            field: self._empty(self.dtypes[field], self._capacity) for field in self.fields
+        }
+        # 整数列无法表示缺失值, 另行记录已写入的行
+        self._filled = {
+            field: np.zeros(self._capacity, dtype=bool)
+            for field, column in self._columns.items()
+            if np.issubdtype(column.dtype, np.integer)
+        }
+        self._rank = np.full(self._capacity, np.iinfo(np.int64).max, dtype=np.int64)
+        self._slot = {}
+        self._size = 0
+
+    @staticmethod
+    def _empty(dtype, capacity: int) -> np.ndarray:
+        if dtype == object:
+            return np.full(capacity, None, dtype=object)
+        if np.issubdtype(dtype, np.integer):
+            return np.zeros(capacity, dtype=dtype)
+        return np.full(capacity, np.nan, dtype=dtype)
+
+    def _grow(self, capacity: int):
+        for field, column in self._columns.items():
+            new_column = self._empty(column.dtype, capacity)
+            new_column[: self._capacity] = column
+            self._columns[field] = new_column
+        for field, filled in self._filled.items():
+            new_filled = np.zeros(capacity, dtype=bool)
+            new_filled[: self._capacity] = filled
+            self._filled[field] = new_filled
+        rank = np.full(capacity, np.iinfo(np.int64).max, dtype=np.int64)
+        rank[: self._capacity] = self._rank
+        self._rank = rank
+        self._capacity = capacity
+
+    def _rows(self, keys: List[tuple]) -> np.ndarray:
+        rows = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            row = self._slot.get(key)
+            if row is None:
+                # 分页期间行情变动可能导致总数略有增加
+                if self._size == self._capacity:
+                    self._grow(max(self._capacity * 2, 1))
+                row = self._slot[key] = self._size
+                self._size += 1
+            rows[i] = row
+        return rows
+
+    def _to_float(self, field: str, column: np.ndarray) -> np.ndarray:
+        column = column.astype(np.float64)
+        column[~self._filled.pop(field)] = np.nan
+        return column
+
+    def add_page(self, page: int, diff: List[Dict]):
+        """
+        写入一页 diff 记录
+        每个字段只遍历一次, 转换后的值直接写入预分配的定型列, 不生成逐页的中间列;
+        数值字段的 "-" 等占位符写为 NaN, 整数字段出现缺失值或小数时整列转为浮点
+        :param page: 页码, 从 1 开始
+        :type page: int
+        :param diff: 该页 diff 记录, 每条记录须包含 f12 和 f13
+        :type diff: list
+        """
+        if not diff:
+            return
+        rows = self._rows([(item["f13"], item["f12"]) for item in diff])
+        rank = (page - 1) * self.per_page_num + np.arange(len(rows), dtype=np.int64)
+        self._rank[rows] = np.minimum(self._rank[rows], rank)
+        for field in diff[0]:
+            column = self._columns.get(field)
+            if column is None:
+                continue
+            values = (item.get(field) for item in diff)
+            if column.dtype == object:
+                column[rows] = [None if value == "-" else value for value in values]
+                continue
+            integer = field in self._filled
+            values = np.fromiter(
+                (
+                    math.nan if value is None or value.__class__ is str else value
+                    for value in values
+                ),
+                np.float64 if integer else column.dtype,
+                len(diff),
+            )
+            if integer:
+                if np.array_equal(values, np.round(values)):
+                    values = values.astype(column.dtype)
+                    self._filled[field][rows] = True
+                else:
+                    # 尚未写入的行置为 NaN
+                    column = self._columns[field] = self._to_float(field, column)
+            column[rows] = values
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        输出拼装结果
+        :return: 合并后的数据
+        :rtype: pandas.DataFrame
+        """
+        for field in list(self._filled):
+            if not self._filled[field][: self._size].all():
+                self._columns[field] = self._to_float(field, self._columns[field])
+        order = np.argsort(self._rank[: self._size], kind="stable")
+        if np.array_equal(order, np.arange(self._size)):
+            columns = {field: column[: self._size] for field, column in self._columns.items()}
+        else:
+            columns = {field: column[order] for field, column in self._columns.items()}
+        # 一次性构造, 同类型列合并为同一块, 避免后续插入列时产生碎片化告警
+        return pd.DataFrame(columns)
+
+
+async def fetch_clist_async(
+    fetcher: EmFetcher,
+    url: str,
+    base_params: Dict,
+    field_batches: List[str],
+    progress: bool = True,
+    dtypes: Dict[str, str] = None,
+) -> pd.DataFrame:
+    """
+    东方财富-并发获取 (字段批次 × 分页) 全部数据
+    先请求第一批字段的第一页确定分页信息, 其余所有批次和页面一次性并发调度,
+    每批字段都会附带 f12 和 f13, 用于按证券对齐各批次的数据;
+    每页记录到达后逐字段一次遍历写入定型列
+    :param fetcher: 异步抓取调度器
+    :type fetcher: EmFetcher
+    :param url: 请求地址
+    :type url: str
+    :param base_params: 基础请求参数, 不含 fields
+    :type base_params: dict
+    :param field_batches: 每个批次的 fields 参数
+    :type field_batches: list
+    :param progress: 是否显示进度条
+    :type progress: bool
+    :param dtypes: 字段类型, 取值为 "str" 或 numpy dtype 名称, 缺省的字段为 object 列
+    :type dtypes: dict
+    :return: 合并后的数据
+    :rtype: pandas.DataFrame
+    """
+    batch_fields = []
+    for fields in field_batches:
+        fields = fields.split(",")
+        batch_fields.append(
+            fields + [key for key in ClistAssembler.key_fields if key not in fields]
+        )
+    all_fields = [field for fields in batch_fields for field in fields]
+
+    async def fetch_page(batch, page):
+        params = {**base_params, "fields": ",".join(batch_fields[batch]), "pn": str(page)}
+        total, diff = await fetcher.post(url, params, parse=decode_clist_page)
+        return page, total, diff
+
+    _, total, diff = await fetch_page(0, 1)
+    if not diff:
+        return pd.DataFrame(columns=list(dict.fromkeys(all_fields)))
+    per_page_num = len(diff)
+    total_page = math.ceil(total / per_page_num)
+    assembler = ClistAssembler(all_fields, per_page_num, total_page, dtypes)
+    assembler.add_page(1, diff)
+
+    tasks = [
+        fetch_page(batch, page)
+        for batch in range(len(batch_fields))
+        for page in range(1, total_page + 1)
+        if (batch, page) != (0, 1)
     ]
-    return temp_df
+    tqdm = get_tqdm()
+    for future in tqdm(
+        asyncio.as_completed(tasks), total=len(tasks), leave=False, disable=not progress
+    ):
+        page, _, diff = await future
+        assembler.add_page(page, diff)
+    return assembler.to_frame()
 
 
-import math
-from typing import List, Dict
+def fetch_clist(
+    url: str,
+    base_params: Dict,
+    field_batches: List[str],
+    concurrency: int = 16,
+    retries: int = 3,
+    timeout: float = 150,
+    hooks: List[Callable[[RequestStats], None]] = None,
+    recorder: ResponseRecorder = None,
+    dtypes: Dict[str, str] = None,
+) -> pd.DataFrame:
+    """
+    东方财富-并发获取 (字段批次 × 分页) 全部数据, 同步调用入口
+    :param url: 请求地址
+    :type url: str
+    :param base_params: 基础请求参数, 不含 fields
+    :type base_params: dict
+    :param field_batches: 每个批次的 fields 参数
+    :type field_batches: list
+    :param concurrency: 全局并发请求上限
+    :type concurrency: int
+    :param retries: 单个请求失败后的重试次数
+    :type retries: int
+    :param timeout: 单个请求超时时间
+    :type timeout: float
+    :param hooks: 每个请求结束后以 RequestStats 调用的回调
+    :type hooks: list
+    :param recorder: 响应录制器, 用于离线回放
+    :type recorder: ResponseRecorder
+    :param dtypes: 字段类型, 取值为 "str" 或 numpy dtype 名称, 缺省的字段为 object 列
+    :type dtypes: dict
+    :return: 合并后的数据
+    :rtype: pandas.DataFrame
+    """
 
-import pandas as pd
-import requests
+    async def run():
+        async with EmFetcher(
+            concurrency=concurrency,
+            retries=retries,
+            timeout=timeout,
+            hooks=hooks,
+            recorder=recorder,
+        ) as fetcher:
+            return await fetch_clist_async(
+                fetcher, url, base_params, field_batches, dtypes=dtypes
+            )
 
-from akshare.utils.tqdm import get_tqdm
-def fetch_paginated_data(url: str, base_params: Dict, timeout: int = 150):
+    return asyncio.run(run())
+
+
+def fetch_paginated_data(
+    url: str,
+    base_params: Dict,
+    timeout: int = 150,
+    hooks: List[Callable[[RequestStats], None]] = None,
+    recorder: ResponseRecorder = None,
+):
     """
     东方财富-分页获取数据并合并结果
     https://quote.eastmoney.com/f1.html?newcode=0.000001
@@ -123,107 +709,276 @@ def fetch_paginated_data(url: str, base_params: Dict, timeout: int = 150):
     :type base_params: dict
     :param timeout: 请求超时时间
     :type timeout: str
+    :param hooks: 每个请求结束后以 RequestStats 调用的回调
+    :type hooks: list
+    :param recorder: 响应录制器, 用于离线回放
+    :type recorder: ResponseRecorder
     :return: 合并后的数据
     :rtype: pandas.DataFrame
     """
-    # 复制参数以避免修改原始参数
     params = base_params.copy()
-    # 获取第一页数据，用于确定分页信息
-    r = requests.post(url, data=params, timeout=timeout)
-    print(r.text)
-    data_json = r.json()
-    # 计算分页信息
-    per_page_num = len(data_json["data"]["diff"])
-    total_page = math.ceil(data_json["data"]["total"] / per_page_num)
-    # 存储所有页面数据
-    temp_list = []
-    # 添加第一页数据
-    temp_list.append(pd.DataFrame(data_json["data"]["diff"]))
-    # 获取进度条
-    tqdm = get_tqdm()
-    import asyncio
-    import aiohttp
-
-    async def fetch_page(session, url, params, page):
-        params.update({"pn": page})
-        async with session.post(url, data=params, timeout=timeout) as response:
-            data = await response.json()
-            return pd.DataFrame(data["data"]["diff"])
-
-    async def fetch_all_pages():
-        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=10)) as session:
-            tasks = [fetch_page(session, url, params, page) for page in range(1, total_page + 1)]
-            for future in tqdm(asyncio.as_completed(tasks), total=total_page, leave=False):
-                inner_temp_df = await future
-                temp_list.append(inner_temp_df)
-
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(fetch_all_pages())
-    #
-    # 合并所有数据
+    fields = params.pop("fields")
+    return fetch_clist(
+        url,
+        params,
+        [fields],
+        timeout=timeout,
+        hooks=hooks,
+        recorder=recorder,
+        dtypes=DEFAULT_DTYPES,
+    )
+
+
+async def stock_zh_a_hist_iter(
+    fetcher: EmFetcher,
+    symbols: Iterable[str],
+    period: str = "daily",
+    start_date: str = "19700101",
+    end_date: str = "20500101",
+    adjust: str = "",
+    cache_dir: str = None,
+    price_dtype: str = "float64",
+    url: str = KLINE_URL,
+) -> AsyncIterator[Tuple[str, Optional[pd.DataFrame], Optional[Exception]]]:
+    """
+    东方财富网-沪深京 A 股-每日行情, 多只股票并发获取
+    按完成顺序逐只产出 (股票代码, 行情, 异常), 在途任务数不超过调度器并发上限的两倍,
+    内存占用不随股票数量增长; 单只股票失败时产出其异常, 不中断其余股票
+    :param fetcher: 异步抓取调度器
+    :type fetcher: EmFetcher
+    :param symbols: 股票代码
+    :type symbols: list
+    :param period: choice of {'daily', 'weekly', 'monthly'}
+    :type period: str
+    :param start_date: 开始日期
+    :type start_date: str
+    :param end_date: 结束日期
+    :type end_date: str
+    :param adjust: choice of {"qfq": "前复权", "hfq": "后复权", "": "不复权"}
+    :type adjust: str
+    :param cache_dir: 本地缓存目录, 设置后只增量获取缓存之后的新数据
+    :type cache_dir: str
+    :param price_dtype: choice of {"float64", "float32"}
+    :type price_dtype: str
+    :param url: 请求地址, 可指向本地回放服务器
+    :type url: str
+    :return: (股票代码, 每日行情, 异常)
+    :rtype: tuple
+    """
+
+    # 缓存统一以 float64 保存, 不随 price_dtype 变化
+    dtype = price_dtype if cache_dir is None else "float64"
+
+    async def fetch_one(symbol):
+        async def fetch(beg, end="20500101"):
+            params = _kline_params(symbol, period, beg, end, adjust)
+            data_json = await fetcher.post_json(url, params)
+            return _parse_klines(data_json, symbol, dtype)
+
+        if cache_dir is None:
+            return await fetch(start_date, end_date)
+        temp_df = await KlineCache(cache_dir).update_async(symbol, period, adjust, fetch)
+        return _cast_prices(filter_dates(temp_df, start_date, end_date), price_dtype)
+
+    symbol_iter = iter(symbols)
+    pending = {}
+    try:
+        while True:
+            while len(pending) < fetcher.concurrency * 2:
+                symbol = next(symbol_iter, None)
+                if symbol is None:
+                    break
+                pending[asyncio.ensure_future(fetch_one(symbol))] = symbol
+            if not pending:
+                return
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                symbol = pending.pop(task)
+                exc = task.exception()
+                yield symbol, None if exc else task.result(), exc
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def stock_zh_a_hist_many(
+    symbols: List[str],
+    period: str = "daily",
+    start_date: str = "19700101",
+    end_date: str = "20500101",
+    adjust: str = "",
+    concurrency: int = 8,
+    rate: float = 20,
+    retries: int = 3,
+    timeout: float = 30,
+    cache_dir: str = None,
+    price_dtype: str = "float64",
+    url: str = KLINE_URL,
+    hooks: List[Callable[[RequestStats], None]] = None,
+    recorder: ResponseRecorder = None,
+) -> Tuple[pd.DataFrame, Dict[str, Exception]]:
+    """
+    东方财富网-沪深京 A 股-每日行情, 多只股票批量获取
+    :param symbols: 股票代码
+    :type symbols: list
+    :param period: choice of {'daily', 'weekly', 'monthly'}
+    :type period: str
+    :param start_date: 开始日期
+    :type start_date: str
+    :param end_date: 结束日期
+    :type end_date: str
+    :param adjust: choice of {"qfq": "前复权", "hfq": "后复权", "": "不复权"}
+    :type adjust: str
+    :param concurrency: 全局并发请求上限
+    :type concurrency: int
+    :param rate: 每秒最多发起的请求数
+    :type rate: float
+    :param retries: 单个请求失败后的重试次数
+    :type retries: int
+    :param timeout: 单个请求的总超时时间, 秒; None 表示完全不设超时
+    :type timeout: float
+    :param cache_dir: 本地缓存目录, 设置后只增量获取缓存之后的新数据
+    :type cache_dir: str
+    :param price_dtype: choice of {"float64", "float32"}
+    :type price_dtype: str
+    :param url: 请求地址, 可指向本地回放服务器
+    :type url: str
+    :param hooks: 每个请求结束后以 RequestStats 调用的回调
+    :type hooks: list
+    :param recorder: 响应录制器, 用于离线回放
+    :type recorder: ResponseRecorder
+    :return: 长格式的每日行情, 以及获取失败的股票代码及其异常
+    :rtype: tuple
+    """
+    symbols = list(symbols)
+
+    async def run():
+        temp_list = []
+        failures = {}
+        tqdm = get_tqdm()
+        progress_bar = tqdm(total=len(symbols), leave=False)
+        async with EmFetcher(
+            concurrency=concurrency,
+            retries=retries,
+            timeout=timeout,
+            rate=rate,
+            hooks=hooks,
+            recorder=recorder,
+        ) as fetcher:
+            async for symbol, temp_df, exc in stock_zh_a_hist_iter(
+                fetcher,
+                symbols,
+                period,
+                start_date,
+                end_date,
+                adjust,
+                cache_dir,
+                price_dtype,
+                url,
+            ):
+                if exc is not None:
+                    failures[symbol] = exc
+                elif not temp_df.empty:
+                    temp_list.append(temp_df)
+                progress_bar.update(1)
+        progress_bar.close()
+        return temp_list, failures
+
+    temp_list, failures = asyncio.run(run())
+    if not temp_list:
+        return pd.DataFrame(), failures
     temp_df = pd.concat(temp_list, ignore_index=True)
-    
-    return temp_df
+    # 各股票的 category 取值不同, concat 后退化为 object, 这里重新编码
+    temp_df["股票代码"] = temp_df["股票代码"].astype("category")
+    return temp_df, failures
+
 
-def stock_zh_a_spot_em() -> pd.DataFrame:
+SPOT_URL = "https://82.push2.eastmoney.com/api/qt/clist/get"
+SPOT_BASE_PARAMS = {
+    "pz": "100",
+    "po": "1",
+    "np": "1",
+    "ut": "bd1d9ddb04089700cf9c27f6f7426281",
+    "fltt": "2",
+    "invt": "2",
+    "fid": "f12",
+    "fs": "m:0 t:6,m:0 t:80,m:1 t:2,m:1 t:23,m:0 t:81 s:2048",
+}
+
+
+def stock_zh_a_spot_em(
+    fields: List[str] = None,
+    concurrency: int = 16,
+    retries: int = 3,
+    timeout: float = 150,
+    field_cache: str = "./data/fields.json",
+    field_ttl: float = 7 * 24 * 3600,
+    url: str = SPOT_URL,
+    hooks: List[Callable[[RequestStats], None]] = None,
+    recorder: ResponseRecorder = None,
+) -> pd.DataFrame:
     """
     东方财富网-沪深京 A 股-实时行情
     https://quote.eastmoney.com/center/gridlist.html#hs_a_board
+    :param fields: 需要获取的字段, 如 ["f2", "f3", "f14"]; 默认为字段注册表中有数据的字段
+    :type fields: list
+    :param concurrency: 全局并发请求上限
+    :type concurrency: int
+    :param retries: 单个请求失败后的重试次数
+    :type retries: int
+    :param timeout: 单个请求超时时间
+    :type timeout: float
+    :param field_cache: 字段注册表缓存路径, None 表示不使用注册表而请求全部字段
+    :type field_cache: str
+    :param field_ttl: 字段注册表有效期, 秒; 过期后请求全部字段并重新探测
+    :type field_ttl: float
+    :param url: 请求地址, 可指向本地回放服务器
+    :type url: str
+    :param hooks: 每个请求结束后以 RequestStats 调用的回调
+    :type hooks: list
+    :param recorder: 响应录制器, 用于离线回放
+    :type recorder: ResponseRecorder
     :return: 实时行情
     :rtype: pandas.DataFrame
     """
-    url = "https://82.push2.eastmoney.com/api/qt/clist/get"
-    flist = []
-    # for i in range(4000):
-    #     flist.append(f'f{i}')
-    # x= ','.join(flist)
-    x = 'f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f11,f12,f13,f14,f15,f16,f17,f18,f19,f20,f21,f22,f23,f24,f25,f26,f27,f28,f29,f30,f31,f32,f33,f34,f35,f36,f37,f38,f39,f40,f41,f42,f43,f44,f45,f46,f47,f48,f49,f50,f51,f52,f53,f54,f55,f56,f57,f58,f59,f60,f61,f62,f63,f64,f65,f66,f67,f68,f69,f70,f71,f72,f73,f74,f75,f76,f77,f78,f79,f80,f81,f82,f83,f84,f85,f86,f87,f88,f89,f90,f91,f92,f94,f95,f97,f98,f99,f100,f101,f146,f147,f102,f103,f104,f105,f106,f107,f108,f109,f110,f111,f112,f113,f114,f115,f116,f117,f118,f119,f120,f121,f122,f123,f124,f125,f126,f127,f128,f140,f141,f129,f130,f131,f132,f133,f134,f135,f136,f137,f138,f139,f142,f143,f144,f145,f148,f149,f152,f153,f154,f160,f161,f162,f163,f164,f165,f166,f167,f168,f169,f170,f171,f172,f173,f174,f175,f176,f177,f178,f179,f180,f181,f182,f183,f184,f185,f186,f187,f188,f189,f190,f191,f192,f193,f194,f195,f196,f197,f199,f200,f201,f202,f203,f204,f205,f206,f207,f208,f209,f210,f211,f212,f213,f214,f215,f216,f217,f218,f219,f220,f221,f222,f223,f225,f226,f227,f228,f229,f230,f231,f232,f233,f234,f235,f236,f237,f238,f239,f240,f241,f242,f243,f244,f245,f246,f247,f248,f249,f250,f251,f252,f253,f254,f255,f256,f257,f258,f259,f260,f261,f262,f263,f264,f265,f266,f267,f268,f269,f270,f271,f272,f273,f274,f275,f276,f277,f278,f279,f280,f281,f282,f292,f293,f294,f295,f296,f297,f298,f299,f300,f301,f302,f303,f304,f305,f306,f307,f308,f309,f310,f311,f312,f313,f314,f315,f316,f317,f318,f319,f320,f321,f322,f323,f324,f325,f326,f327,f328,f329,f330,f331,f332,f333,f334,f335,f336,f337,f339,f340,f341,f342,f343,f344,f345,f346,f347,f348,f349,f350,f351,f352,f353,f354,f355,f356,f357,f358,f359,f360,f361,f362,f363,f364,f365,f366,f367,f368,f369,f370,f371,f372,f373,f374,f375,f376,f377,f378,f379,f380,f381,f382,f383,f384,f385,f386,f387,f388,f389,f390,f391,f392,f393,f394,f395,f396,f397,f398,f399,f400,f402,f403,f408,f409,f410,f411,f412,f413,f414,f415,f416,f417,f418,f419,f420,f421,f422,f423,f424,f425,f426,f427,f428,f429,f430,f431,f432,f433,f434,f435,f436,f437,f438,f439,f440,f441,f442,f443,f444,f445,f446,f447,f448,f449,f450,f451,f452,f453,f454,f455,f456,f457,f458,f459,f460,f461,f462,f463,f464,f465,f466,f467,f468,f469,f470,f471,f472,f473,f474,f475,f476,f477,f478,f479,f480,f481,f482,f484,f485,f486,f487,f488,f489,f490,f491,f492,f493,f494,f495,f496,f497,f498,f499,f500,f501,f502,f503,f600,f601,f602,f603,f604,f605,f606,f607,f608,f609,f610,f611,f612,f613,f614,f615,f616,f617,f624,f625,f626,f627,f628,f629'
-    x += ',f1000,f2000,f3000'
-    x_list = x.split(',')
-
-    # 分批处理数据，每批100个字段
-    batch_size = 200
-    temp_df_list = []
-    
-    # 获取进度条
-    tqdm = get_tqdm()
-    
-    # 分批获取数据
-    for i in tqdm(range(0, len(x_list), batch_size), leave=False):
-        batch_fields = x_list[i:i + batch_size]
-        batch_x = ','.join(batch_fields)
-        print(batch_x)
-        
-        batch_params = {
-            "pn": "1",
-            "pz": "100",
-            "po": "1",
-            "np": "1",
-            "ut": "bd1d9ddb04089700cf9c27f6f7426281",
-            "fltt": "2",
-            "invt": "2",
-            "fid": "f12",
-            "fs": "m:0 t:6,m:0 t:80,m:1 t:2,m:1 t:23,m:0 t:81 s:2048",
-            "fields": batch_x,
-        }
-        
-        # 获取当前批次数据
-        batch_df = fetch_paginated_data(url, batch_params)
-        temp_df_list.append(batch_df)
-    
-    # 合并所有批次数据
-    if temp_df_list:
-        temp_df = pd.concat(temp_df_list, axis=1)
-        # 去除重复列
-        temp_df = temp_df.loc[:, ~temp_df.columns.duplicated()]
-    else:
-        temp_df = pd.DataFrame()
-    
-    temp_df["f3"] = pd.to_numeric(temp_df["f3"], errors="coerce")
-    temp_df.sort_values(by=["f3"], ascending=False, inplace=True, ignore_index=True)
-    temp_df.reset_index(inplace=True)
-    temp_df["index"] = temp_df["index"].astype(int) + 1
+    probe = False
+    dtypes = DEFAULT_DTYPES
+    registry = None
+    if field_cache:
+        registry = FieldRegistry.load(field_cache, field_ttl)
+    if registry is not None:
+        # 固定类型表优先, 其余字段使用探测推断的类型
+        dtypes = {**registry.dtypes(), **DEFAULT_DTYPES}
+    if fields is None:
+        if registry is None:
+            fields = CANDIDATE_FIELDS
+            probe = field_cache is not None
+        else:
+            fields = registry.live_fields()
+
+    # 按字段数分成尽量少的批次, 所有批次和分页共用一个会话并发获取
+    field_batches = pack_fields(fields)
+    temp_df = fetch_clist(
+        url,
+        SPOT_BASE_PARAMS,
+        field_batches,
+        concurrency=concurrency,
+        retries=retries,
+        timeout=timeout,
+        hooks=hooks,
+        recorder=recorder,
+        dtypes=dtypes,
+    )
+    if probe:
+        FieldRegistry.from_frame(temp_df).save(field_cache)
+    if "f3" not in temp_df.columns:
+        return temp_df
+
+    # 按涨跌幅降序, 缺失值排在最后, 一次取行并生成序号列
+    order = np.argsort(-temp_df["f3"].to_numpy(np.float64), kind="stable")
+    temp_df = temp_df.take(order)
+    temp_df.index = pd.RangeIndex(len(temp_df))
+    temp_df.insert(0, "index", np.arange(1, len(temp_df) + 1))
     
     
     return temp_df
@@ -234,25 +989,22 @@ if __name__ == "__main__":
     
     # df = stock_zh_a_hist(symbol='000001', start_date='20250418')
     # df = ak.stock_zh_a_spot_em()
-    df = stock_zh_a_spot_em()
-    print(df)
+    stats = StatsCollector()
+    df = stock_zh_a_spot_em(hooks=[stats])
+    summary = stats.summary()
+    print(
+        f"{df.shape[0]} 行 {df.shape[1]} 列, {summary['requests']} 个请求, "
+        f"重试 {summary['retries']} 次, {summary['bytes'] / 2**20:.1f} MB, "
+        f"耗时 {summary['wall']:.1f} 秒"
+    )
     
-    # 获取今天日期作为文件名
-    today_date = pd.Timestamp.now().strftime('%Y-%m-%d')
-    # 创建csv目录
-    import os; os.makedirs('./csv', exist_ok=True)
-    # 保存为csv文件
-    df.to_csv(f'./csv/{today_date}.csv', index=False)
-    print(f"数据已保存到 ./csv/{today_date}.csv")
-    
-    
-#%%
-# import pandas as pd
-# df = pd.read_csv('./csv/2025-04-20.csv')
-# # 筛选出所有有数据的列
-# non_empty_cols = [col for col in df.columns if not df[col].isnull().all()]
-# # 打印列名
-# print("有数据的列名：")
-# for col in non_empty_cols:
-#     print(col, end=',')
+    # 按日期分区写入 Parquet 快照存档
+    path = write_snapshot(df, './data/spot')
+    print(f"数据已保存到 {path}")
 
+
+#%%
+# from snapshot_store import read_snapshots
+# # 只读取代码、名称和涨跌幅三列的多日数据
+# df = read_snapshots('./data/spot', columns=['f12', 'f14', 'f3'], start_date='2025-04-01')
+# print(df)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+Date: 2026/10/17 13:00
+Desc: 沪深京 A 股实时行情快照按日期分区的 Parquet 存档
+root/date=YYYY-MM-DD/part-0.parquet, 写入时去除全空列、压缩数值类型、代码和名称字典编码
+"""
+
+import glob
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+CATEGORY_COLUMNS = ["f12", "f13", "f14"]
+
+
+def _is_text(series: pd.Series) -> bool:
+    # pandas 3 中字符串列默认为 StringDtype, 不再是 object
+    return pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(
+        series.dtype
+    )
+
+
+def _compact(temp_df: pd.DataFrame) -> pd.DataFrame:
+    temp_df = temp_df.copy()
+    for column in temp_df.columns:
+        series = temp_df[column]
+        if _is_text(series):
+            # 逐列把占位符 "-" 换成缺失值, 不经过 DataFrame.replace 的隐式类型降级
+            values = series.to_numpy(dtype=object, copy=True)
+            values[series.isin(["-"]).to_numpy()] = None
+            temp_df[column] = pd.Series(values, index=series.index, dtype=object)
+    temp_df = temp_df.dropna(axis=1, how="all")
+    for column in temp_df.columns:
+        series = temp_df[column]
+        if column in CATEGORY_COLUMNS:
+            temp_df[column] = series.astype("category")
+            continue
+        if _is_text(series):
+            values = series.dropna()
+            if not values.map(lambda value: isinstance(value, (int, float))).all():
+                # 含字符串的列 (代码、名称、板块等) 按字典编码保存, 保留前导零
+                temp_df[column] = series.astype(str).where(series.notna()).astype("category")
+                continue
+            series = pd.to_numeric(series)
+        if series.dtype.kind in "iu":
+            temp_df[column] = pd.to_numeric(series, downcast="integer")
+            continue
+        if series.dtype.kind != "f":
+            continue
+        values = series.to_numpy()
+        if not np.isnan(values).any() and np.array_equal(values, np.round(values)):
+            temp_df[column] = pd.to_numeric(series, downcast="integer")
+            continue
+        # 仅在保留 4 位小数精度时使用 float32, 市值、成交额等大数保持 float64
+        single = values.astype(np.float32)
+        if np.array_equal(
+            np.round(single.astype(np.float64), 4), np.round(values, 4), equal_nan=True
+        ):
+            temp_df[column] = single
+        else:
+            temp_df[column] = series
+    return temp_df
+
+
+def write_snapshot(temp_df: pd.DataFrame, root: str, date: str = None) -> str:
+    """
+    写入一天的实时行情快照
+    :param temp_df: 实时行情
+    :type temp_df: pandas.DataFrame
+    :param root: 存档根目录
+    :type root: str
+    :param date: 快照日期, 如 2025-04-20, 默认为今天
+    :type date: str
+    :return: 写入的文件路径
+    :rtype: str
+    """
+    date = pd.Timestamp(date or pd.Timestamp.now()).strftime("%Y-%m-%d")
+    path = os.path.join(root, f"date={date}", "part-0.parquet")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _compact(temp_df).to_parquet(path, index=False, compression="zstd")
+    return path
+
+
+def list_snapshots(root: str, start_date: str = None, end_date: str = None) -> List[str]:
+    """
+    列出日期区间内的快照日期
+    :param root: 存档根目录
+    :type root: str
+    :param start_date: 开始日期
+    :type start_date: str
+    :param end_date: 结束日期
+    :type end_date: str
+    :return: 快照日期, 升序
+    :rtype: list
+    """
+    date_list = sorted(
+        os.path.basename(path)[len("date="):]
+        for path in glob.glob(os.path.join(root, "date=*"))
+    )
+    if start_date:
+        start_date = pd.Timestamp(start_date).strftime("%Y-%m-%d")
+        date_list = [date for date in date_list if date >= start_date]
+    if end_date:
+        end_date = pd.Timestamp(end_date).strftime("%Y-%m-%d")
+        date_list = [date for date in date_list if date <= end_date]
+    return date_list
+
+
+def read_snapshots(
+    root: str,
+    columns: List[str] = None,
+    start_date: str = None,
+    end_date: str = None,
+) -> pd.DataFrame:
+    """
+    读取多日快照, 只读取所需列的列块, 不解析整个文件
+    某天因全空被去除的列以缺失值补齐
+    :param root: 存档根目录
+    :type root: str
+    :param columns: 需要读取的列, 默认全部列
+    :type columns: list
+    :param start_date: 开始日期
+    :type start_date: str
+    :param end_date: 结束日期
+    :type end_date: str
+    :return: 多日快照, 附带 date 列
+    :rtype: pandas.DataFrame
+    """
+    temp_list = []
+    for date in list_snapshots(root, start_date, end_date):
+        path = os.path.join(root, f"date={date}", "part-0.parquet")
+        if columns is None:
+            temp_df = pq.read_table(path).to_pandas()
+        else:
+            names = pq.read_schema(path).names
+            temp_df = pq.read_table(
+                path, columns=[column for column in columns if column in names]
+            ).to_pandas()
+        temp_df.insert(0, "date", pd.Timestamp(date))
+        temp_list.append(temp_df)
+    if not temp_list:
+        return pd.DataFrame(columns=["date"] + (columns or []))
+    # 缺列由 concat 对齐补齐, 避免 reindex 生成的全空列在 concat 时触发 FutureWarning
+    temp_df = pd.concat(temp_list, ignore_index=True)
+    if columns is not None:
+        temp_df = temp_df.reindex(columns=["date"] + columns)
+    return temp_df